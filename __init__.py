@@ -6,5 +6,6 @@ __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS"]
 # Frontend extension (drag&drop HEIC/HEIF upload handling)
 WEB_DIRECTORY = "web"
 
-# Best-effort preview route registration; will also be attempted lazily from INPUT_TYPES.
+# Routes must be added before ComfyUI mounts its route table, so this cannot wait for first
+# use; it only imports modules the server has already loaded. INPUT_TYPES retries it.
 _register_preview_route_if_possible()
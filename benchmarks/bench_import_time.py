@@ -0,0 +1,105 @@
+"""Time ``import nodes`` with ``python -X importtime``, optionally against another revision.
+
+Usage: python benchmarks/bench_import_time.py [--baseline REV] [--repeat 5] [--top 8]
+
+Every run is a fresh interpreter. Two scenarios are measured:
+
+  cold     nothing preloaded: the cost for tools and scripts that import the node alone
+  comfyui  numpy, torch, Pillow and aiohttp imported first, as ComfyUI has done by the
+           time it loads custom nodes, so only what the node adds is counted
+
+``--baseline REV`` extracts ``nodes.py`` from that git revision (e.g. ``HEAD~1``) into a
+temporary directory and measures it the same way. The table lists the best cumulative
+``nodes`` import time of ``--repeat`` runs, followed by the heaviest direct imports of
+the working tree's ``nodes.py`` in the cold scenario.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMFYUI_PRELOAD = ("numpy", "torch", "PIL.Image", "PIL.ImageOps", "aiohttp.web")
+SCENARIOS = {"cold": (), "comfyui": COMFYUI_PRELOAD}
+
+
+def _import_times(directory: str, preload) -> list[tuple[int, int, str]]:
+    """(depth, cumulative us, module) rows of one ``import nodes``, in importtime order."""
+    code = "".join(f"import {m}; " for m in preload) + "import nodes"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=directory,
+        env={**os.environ, "PYTHONPATH": directory},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        stripped = name.lstrip()
+        rows.append(((len(name) - len(stripped) - 1) // 2, int(cumulative), stripped))
+    return rows
+
+
+def _nodes_rows(rows):
+    """The ``nodes`` row and the rows of the modules it imported."""
+    for end, (depth, _, name) in enumerate(rows):
+        if depth == 0 and name == "nodes":
+            start = end
+            while start > 0 and rows[start - 1][0] > 0:
+                start -= 1
+            return rows[end], rows[start:end]
+    raise RuntimeError("nodes was not imported")
+
+
+def _best_ms(directory: str, preload, repeat: int) -> float:
+    return min(_nodes_rows(_import_times(directory, preload))[0][1] for _ in range(repeat)) / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    trees = [("working tree", ROOT)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.baseline:
+            source = subprocess.run(
+                ["git", "show", f"{args.baseline}:nodes.py"],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            with open(os.path.join(tmp, "nodes.py"), "w") as f:
+                f.write(source)
+            trees.insert(0, (args.baseline, tmp))
+
+        print(f"import nodes, best of {args.repeat}")
+        print(f"{'tree':<16}" + "".join(f"{s + ' ms':>14}" for s in SCENARIOS))
+        results = {}
+        for label, directory in trees:
+            results[label] = [_best_ms(directory, preload, args.repeat) for preload in SCENARIOS.values()]
+            print(f"{label:<16}" + "".join(f"{ms:>14.1f}" for ms in results[label]))
+        if args.baseline:
+            base, new = results[args.baseline], results["working tree"]
+            print(f"{'speedup':<16}" + "".join(f"{b / n:>13.1f}x" for b, n in zip(base, new)))
+
+    _, children = _nodes_rows(_import_times(ROOT, ()))
+    direct = sorted((row for row in children if row[0] == 1), key=lambda row: -row[1])
+    print("\nheaviest direct imports of nodes.py (cold)")
+    for _, cumulative, name in direct[: args.top]:
+        print(f"  {name:<28}{cumulative / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
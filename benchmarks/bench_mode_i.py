@@ -0,0 +1,79 @@
+"""Time the conversion of 32-bit integer ("I" mode) frames into the IMAGE tensor.
+
+Usage: python benchmarks/bench_mode_i.py [--width 8000] [--height 6000] [--repeat 3]
+
+The frame holds 16-bit samples in an "I" image, which is how Pillow hands over 16-bit
+TIFFs and (in older releases) 16-bit PNGs. The baseline row is the original
+``point(lambda i: i * (1 / 255)).convert("RGB")`` path; the other row is the array
+conversion the loader uses now. Both write into a ``nodes._FrameBatch`` slot.
+
+Pillow already runs a linear ``point`` lambda as one C pass, so on a single core the two
+paths are close; the array path skips the intermediate "I" and RGB images and lets torch
+spread the channel broadcast over all cores.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes  # noqa: E402
+
+
+def _baseline(i: Image.Image) -> torch.Tensor:
+    batch = nodes._FrameBatch(1)
+    rgb = i.point(lambda i: i * (1 / 255)).convert("RGB")
+    batch.accepts(*rgb.size)
+    batch.add(np.asarray(rgb), torch.zeros((64, 64)))
+    return batch.image
+
+
+def _vectorized(i: Image.Image) -> torch.Tensor:
+    batch = nodes._FrameBatch(1)
+    batch.accepts(*i.size)
+    gray = np.asarray(i) // 255
+    np.clip(gray, 0, 255, out=gray)
+    batch.add(gray, torch.zeros((64, 64)))
+    return batch.image
+
+
+def _time(fn, repeat: int) -> tuple[float, torch.Tensor]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=8000)
+    parser.add_argument("--height", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    samples = rng.integers(0, 65536, (args.height, args.width), dtype=np.int32)
+    img = Image.fromarray(samples, "I")
+
+    base_time, base_out = _time(lambda: _baseline(img), args.repeat)
+    new_time, new_out = _time(lambda: _vectorized(img), args.repeat)
+    err = (new_out - base_out).abs().max().item()
+
+    print(f"{args.width}x{args.height} mode I, best of {args.repeat}")
+    print(f"{'path':<16}{'ms':>10}{'speedup':>10}")
+    print(f"{'point+convert':<16}{base_time * 1000:>10.1f}{1.0:>9.1f}x")
+    print(f"{'vectorized':<16}{new_time * 1000:>10.1f}{base_time / new_time:>9.1f}x")
+    print(f"max abs difference: {err:.1e}")
+
+
+if __name__ == "__main__":
+    main()
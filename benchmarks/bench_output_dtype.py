@@ -0,0 +1,116 @@
+"""Memory, conversion time and downstream compatibility of each IMAGE output dtype.
+
+Usage: python benchmarks/bench_output_dtype.py [--width 4032] [--height 3024] [--frames 1]
+
+Frames are converted with ``nodes._FrameBatch`` (the loader's code path), then fed to
+the tensor operations that common ComfyUI core nodes perform on IMAGE inputs. Each op
+reports OK with its max abs error against float32, or the exception it raises.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes  # noqa: E402
+
+
+def _save_image(image):
+    # SaveImage / PreviewImage
+    i = 255.0 * image[0].cpu().numpy()
+    return torch.from_numpy(np.clip(i, 0, 255).astype(np.uint8).astype(np.float32) / 255.0)
+
+
+def _image_scale(image):
+    # ImageScale (comfy.utils.common_upscale, bilinear with antialias)
+    s = image.movedim(-1, 1)
+    s = torch.nn.functional.interpolate(s, size=(256, 256), mode="bilinear", antialias=True)
+    return s.movedim(1, -1)
+
+
+def _image_scale_bicubic(image):
+    s = image.movedim(-1, 1)
+    return torch.nn.functional.interpolate(s, size=(256, 256), mode="bicubic").movedim(1, -1)
+
+
+def _image_invert(image):
+    # ImageInvert
+    return 1.0 - image
+
+
+def _image_blend(image):
+    # ImageBlend with a float32 image from another loader
+    other = torch.full(image.shape, 0.5, dtype=torch.float32)
+    return image * 0.5 + other * 0.5
+
+
+def _join_mask(image):
+    # JoinImageWithAlpha / mask composites use float32 masks
+    mask = torch.linspace(0, 1, image.shape[2]).expand(image.shape[:3])
+    return torch.cat((image[..., :3], 1.0 - mask.unsqueeze(-1)), dim=-1)
+
+
+def _vae_encode_prep(image):
+    # VAEEncode: crop to multiples of 8, channels first, cast to the VAE dtype
+    h, w = (image.shape[1] // 8) * 8, (image.shape[2] // 8) * 8
+    return image[:, :h, :w, :3].movedim(-1, 1).to(torch.float32)
+
+
+CONSUMERS = [
+    ("SaveImage/PreviewImage", _save_image),
+    ("ImageScale bilinear", _image_scale),
+    ("ImageScale bicubic", _image_scale_bicubic),
+    ("ImageInvert", _image_invert),
+    ("ImageBlend (mixed)", _image_blend),
+    ("JoinImageWithAlpha", _join_mask),
+    ("VAEEncode prep", _vae_encode_prep),
+]
+
+
+def _convert(frames: list[np.ndarray], dtype: torch.dtype):
+    batch = nodes._FrameBatch(len(frames), dtype)
+    for rgb in frames:
+        batch.accepts(rgb.shape[1], rgb.shape[0])
+        batch.add(rgb, torch.zeros((64, 64)))
+    return batch.image
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--frames", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [
+        rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.frames)
+    ]
+
+    reference = _convert(frames, torch.float32)
+    expected = {name: fn(reference).float() for name, fn in CONSUMERS}
+
+    for dtype_name in nodes.OUTPUT_DTYPES:
+        dtype = nodes._output_dtype(dtype_name)
+        start = time.perf_counter()
+        image = _convert(frames, dtype)
+        elapsed = time.perf_counter() - start
+        size = image.element_size() * image.nelement()
+        print(f"\n{dtype_name}: {size / 2**20:.0f} MiB, convert {elapsed * 1000:.0f} ms")
+        for name, fn in CONSUMERS:
+            try:
+                out = fn(image).float()
+            except Exception as e:
+                print(f"  {name:<24} FAIL  {type(e).__name__}: {str(e).splitlines()[0][:60]}")
+                continue
+            err = (out - expected[name]).abs().max().item()
+            print(f"  {name:<24} OK    max err {err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare /heic_preview encode time and payload size per output format.
+
+Usage: python benchmarks/bench_preview_formats.py [--width 4032] [--height 3024] [--repeat 3]
+
+The baseline row is the original preview path (RGBA PNG); the other rows go through
+``nodes._encode_preview`` exactly as the route does.
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes  # noqa: E402
+
+
+def synthetic_photo(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Smooth gradients plus sensor-like noise: compresses roughly like a real photo."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    rng = np.random.default_rng(seed)
+    rgb = np.stack(
+        [
+            127 + 100 * np.sin(x / 300 + y / 500),
+            127 + 100 * np.cos(x / 700),
+            127 + 80 * np.sin(y / 200),
+        ],
+        axis=-1,
+    )
+    rgb += rng.normal(0, 6, rgb.shape)
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8))
+
+
+def _baseline_png(img: Image.Image) -> bytes:
+    bio = BytesIO()
+    img.convert("RGBA").save(bio, format="PNG")
+    return bio.getvalue()
+
+
+def _time(fn, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--quality", type=int, default=nodes.PREVIEW_QUALITY)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    img = synthetic_photo(args.width, args.height)
+    cases = [("png rgba (baseline)", lambda: _baseline_png(img))]
+    for fmt in ("png", "jpeg", "webp"):
+        cases.append((f"{fmt} rgb", lambda fmt=fmt: nodes._encode_preview(img, fmt, True, args.quality)))
+
+    results = [(name, *_time(fn, args.repeat)) for name, fn in cases]
+    base_time, base_size = results[0][1:]
+    print(f"{args.width}x{args.height}, quality={args.quality}, best of {args.repeat}")
+    print(f"{'format':<22}{'ms':>10}{'KiB':>10}{'speedup':>10}{'size':>8}")
+    for name, elapsed, size in results:
+        print(
+            f"{name:<22}{elapsed * 1000:>10.1f}{size / 1024:>10.0f}"
+            f"{base_time / elapsed:>9.1f}x{size / base_size:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
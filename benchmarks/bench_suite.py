@@ -0,0 +1,266 @@
+"""Wall time, peak RSS and allocations of each loader and preview stage.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1024x768,2048x1536] [--frames 1,4]
+       [--formats heic,png,jpeg,gif] [--repeat 3] [--fixtures DIR] [--json results.json]
+
+Synthetic fixtures are generated once into ``--fixtures`` and reused. HEIC files get a
+320 px thumbnail like phone photos; only HEIC and GIF fixtures are written with more than
+one frame. ComfyUI's ``folder_paths`` / ``node_helpers`` are replaced by minimal stand-ins
+that resolve names inside the fixture directory, so no ComfyUI checkout is needed.
+
+Every stage runs in a forked child (where fork exists) so memory does not carry over:
+
+  ms         best wall time of --repeat runs
+  rss MiB    peak resident set growth during a first, untimed run (Linux only)
+  alloc MiB  peak of tracemalloc during that run: Python and NumPy buffers only, since
+             Pillow, libheif and torch allocate outside of it
+
+Compare the ``--json`` output of two revisions to spot regressions.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import torch  # noqa: F401  nodes imports it lazily; load it up front as ComfyUI does
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes  # noqa: E402
+from bench_preview_formats import synthetic_photo  # noqa: E402
+
+EXTENSIONS = {"heic": "heic", "png": "png", "jpeg": "jpg", "gif": "gif"}
+MULTI_FRAME_FORMATS = ("heic", "gif")
+
+
+def _install_comfy_stubs(input_dir: str) -> None:
+    """Minimal folder_paths / node_helpers resolving names inside ``input_dir``."""
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_input_directory = lambda: input_dir
+    folder_paths.get_temp_directory = lambda: os.path.join(input_dir, "temp")
+    folder_paths.get_annotated_filepath = lambda name: os.path.join(input_dir, name)
+    folder_paths.exists_annotated_filepath = lambda name: os.path.exists(os.path.join(input_dir, name))
+    node_helpers = types.ModuleType("node_helpers")
+    node_helpers.pillow = lambda fn, arg: fn(arg)
+    sys.modules["folder_paths"] = folder_paths
+    sys.modules["node_helpers"] = node_helpers
+
+
+def _write_fixture(path: str, fmt: str, size: tuple[int, int], n_frames: int) -> None:
+    frames = [synthetic_photo(*size, seed=k) for k in range(n_frames)]
+    if fmt == "heic":
+        frames[0].save(
+            path, format="HEIF", save_all=True, append_images=frames[1:], quality=80, thumbnails=[320]
+        )
+    elif fmt == "gif":
+        frames = [f.convert("P", palette=Image.Palette.ADAPTIVE) for f in frames]
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0)
+    elif fmt == "jpeg":
+        frames[0].save(path, quality=90)
+    else:
+        frames[0].save(path)
+
+
+def _fixtures(directory: str, formats, sizes, frame_counts) -> list[str]:
+    """Create the missing fixtures; returns their names relative to ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for fmt in formats:
+        if fmt == "heic" and not nodes._try_register_heif_opener():
+            print("pillow-heif is not installed; skipping HEIC fixtures")
+            continue
+        for width, height in sizes:
+            for n_frames in frame_counts:
+                if n_frames > 1 and fmt not in MULTI_FRAME_FORMATS:
+                    continue
+                name = f"{fmt}_{width}x{height}_f{n_frames}.{EXTENSIONS[fmt]}"
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    print(f"generating {name} ...", flush=True)
+                    _write_fixture(path, fmt, (width, height), n_frames)
+                names.append(name)
+    return names
+
+
+# Each stage takes (name, path) and returns the callable to measure; its own setup work
+# (warming a cache, pre-decoding frames) happens before that and is not measured.
+
+
+def _stage_decode(name, path, **kwargs):
+    node = nodes.LoadImagePlusHEIC()
+
+    def run():
+        nodes._TENSOR_CACHE.clear()
+        return node.load_image(name, **kwargs)
+
+    return run
+
+
+def _stage_decode_cached(name, path):
+    node = nodes.LoadImagePlusHEIC()
+    node.load_image(name)
+    return lambda: node.load_image(name)
+
+
+def _stage_to_tensor(name, path):
+    with Image.open(path) as img:
+        frames = []
+        for k in range(getattr(img, "n_frames", 1)):
+            img.seek(k)
+            frames.append(np.asarray(img.convert("RGB")))
+
+    def run():
+        batch = nodes._FrameBatch(len(frames))
+        for rgb in frames:
+            batch.accepts(rgb.shape[1], rgb.shape[0])
+            batch.add(rgb, nodes._zero_mask())
+        return batch.result(name)
+
+    return run
+
+
+def _stage_is_changed(name, path, strict=False):
+    def run():
+        nodes._CONTENT_HASHES.clear()
+        return nodes._file_fingerprint(path, strict=strict)
+
+    return run
+
+
+def _stage_preview(name, path, side=1024, thumbnail="auto"):
+    return lambda: nodes._render_preview(path, (side, side), "auto", True, nodes.PREVIEW_QUALITY, thumbnail)
+
+
+STAGES = [
+    ("load_image", _stage_decode),
+    ("load_image 1MP", lambda name, path: _stage_decode(name, path, max_megapixels=1.0)),
+    ("load_image cached", _stage_decode_cached),
+    ("frames to tensor", _stage_to_tensor),
+    ("IS_CHANGED fast", _stage_is_changed),
+    ("IS_CHANGED strict", lambda name, path: _stage_is_changed(name, path, strict=True)),
+    ("preview 1024", _stage_preview),
+    ("preview 256", lambda name, path: _stage_preview(name, path, side=256)),
+    ("preview 256 full", lambda name, path: _stage_preview(name, path, side=256, thumbnail="off")),
+]
+
+
+def _read_status_kib(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _measure(stage, name: str, path: str, repeat: int) -> dict:
+    fn = stage(name, path)
+
+    # Memory first: once freed, the allocator keeps pages resident for later runs.
+    rss_before = _read_status_kib("VmRSS")
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")  # reset VmHWM (peak RSS) to the current RSS
+    except OSError:
+        rss_before = None
+    tracemalloc.start()
+    fn()
+    alloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_peak = _read_status_kib("VmHWM")
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    rss_growth = None
+    if rss_before is not None and rss_peak is not None:
+        rss_growth = max(0, rss_peak - rss_before) * 1024
+    return {"ms": best * 1000, "rss_bytes": rss_growth, "alloc_bytes": alloc_peak}
+
+
+def _child(conn, stage, name, path, repeat):
+    try:
+        conn.send(_measure(stage, name, path, repeat))
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _run_stage(stage, name: str, path: str, repeat: int) -> dict:
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return _measure(stage, name, path, repeat)
+    ctx = multiprocessing.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(child, stage, name, path, repeat))
+    proc.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": f"worker exited with code {proc.exitcode}"}
+    proc.join()
+    return result
+
+
+def _mib(n) -> str:
+    return "-" if n is None else f"{n / 2**20:.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1024x768,2048x1536")
+    parser.add_argument("--frames", default="1,4")
+    parser.add_argument("--formats", default="heic,png,jpeg,gif")
+    parser.add_argument("--stages", default="", help="comma-separated stage names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "heic_bench_fixtures"))
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in s.lower().split("x")) for s in args.sizes.split(",") if s]
+    frame_counts = [int(n) for n in args.frames.split(",") if n]
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    wanted = {s.strip() for s in args.stages.split(",") if s.strip()}
+    stages = [(label, fn) for label, fn in STAGES if not wanted or label in wanted]
+
+    directory = os.path.abspath(args.fixtures)
+    names = _fixtures(directory, formats, sizes, frame_counts)
+    _install_comfy_stubs(directory)
+
+    results = []
+    print(f"\n{'fixture':<28}{'stage':<20}{'ms':>10}{'rss MiB':>10}{'alloc MiB':>11}")
+    for name in names:
+        path = os.path.join(directory, name)
+        for label, stage in stages:
+            result = _run_stage(stage, name, path, args.repeat)
+            results.append({"fixture": name, "stage": label, **result})
+            if "error" in result:
+                print(f"{name:<28}{label:<20}  {result['error']}")
+                continue
+            print(
+                f"{name:<28}{label:<20}{result['ms']:>10.1f}"
+                f"{_mib(result['rss_bytes']):>10}{_mib(result['alloc_bytes']):>11}",
+                flush=True,
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
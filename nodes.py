@@ -1,21 +1,792 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import glob
 import hashlib
+import importlib
+import logging
 import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+
+class _LazyModule:
+    """Stand-in for a heavy module: the first attribute access imports it and rebinds the
+    module global ``name`` to the real module, so later lookups go straight to it."""
+
+    def __init__(self, name: str, module: str):
+        self._name = name
+        self._module = module
 
-import numpy as np
-import torch
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._module)
+        globals()[self._name] = module
+        return getattr(module, attr)
 
-from PIL import Image, ImageOps, ImageSequence
+
+# numpy, torch and Pillow load on first use, not when ComfyUI imports the custom node.
+if TYPE_CHECKING:
+    import numpy as np
+    import torch
+    from PIL import Image, ImageOps
+else:
+    np = _LazyModule("np", "numpy")
+    torch = _LazyModule("torch", "torch")
+    Image = _LazyModule("Image", "PIL.Image")
+    ImageOps = _LazyModule("ImageOps", "PIL.ImageOps")
 
 
 HEIC_EXTS = {".heic", ".heif"}
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Preview decoding runs on a small thread pool so the ComfyUI event loop stays responsive.
+# Pillow and libheif release the GIL while decoding/encoding, so threads scale well here.
+PREVIEW_WORKERS = _env_int("COMFYUI_HEIC_PREVIEW_WORKERS", min(4, os.cpu_count() or 1))
+PREVIEW_QUEUE_SIZE = _env_int("COMFYUI_HEIC_PREVIEW_QUEUE", 16)
+PREVIEW_CACHE_MB = _env_int("COMFYUI_HEIC_PREVIEW_CACHE_MB", 512)
+PREVIEW_QUALITY = _env_int("COMFYUI_HEIC_PREVIEW_QUALITY", 90)
+
+PREVIEW_FORMATS = ("auto", "png", "jpeg", "webp")
+# "auto": serve an embedded HEIF thumbnail when it covers the requested box. "only": the
+# best embedded thumbnail or 404, never a full decode. "off": always decode the image.
+PREVIEW_THUMBNAIL_MODES = ("auto", "only", "off")
+
+TENSOR_CACHE_MB = _env_int("COMFYUI_HEIC_TENSOR_CACHE_MB", 1024)
+
+# "fast": IS_CHANGED compares (inode, size, mtime_ns). "strict": SHA-256 of the content,
+# recomputed only when that stat tuple changes.
+IS_CHANGED_MODE = os.environ.get("COMFYUI_HEIC_IS_CHANGED", "fast").strip().lower()
+
+# Optional background watcher that keeps the input listing current and pre-renders
+# previews of newly arrived HEIC/HEIF files.
+WATCH_INPUT = os.environ.get("COMFYUI_HEIC_WATCH_INPUT", "").strip().lower() in ("1", "true", "yes", "on")
+WATCH_INTERVAL = max(1, _env_int("COMFYUI_HEIC_WATCH_INTERVAL", 2))
+
+
+# Opt-in per-stage timing of Load Image (HEIC) and /heic_preview: one log line per call
+# plus cumulative counters. When disabled every span is the same no-op context manager.
+TIMING = os.environ.get("COMFYUI_HEIC_TIMING", "").strip().lower() in ("1", "true", "yes", "on")
+
+logger = logging.getLogger(__name__)
+
+_NO_SPAN = contextlib.nullcontext()
+# Spans of the call being traced. A context variable, not a thread-local, so concurrent
+# preview requests on the event loop stay apart; pool jobs run in a copy of it.
+_CURRENT_TRACE = contextvars.ContextVar("heic_timing_trace", default=None)
+
+
+class _StageTimings:
+    """Cumulative count / total / max duration per stage name, e.g. "decode.open"."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._totals = {}  # stage -> [count, total seconds, max seconds]
+        self._lock = threading.Lock()
+
+    def span(self, stage: str):
+        """Context manager timing one stage (a shared no-op when timing is disabled)."""
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(stage)
+
+    def trace(self, label: str, subject: str):
+        """Time a whole call and log it with the spans recorded inside, as one line."""
+        if not self.enabled:
+            return _NO_SPAN
+        return self._trace(label, subject)
+
+    @contextlib.contextmanager
+    def _span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(stage, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def _trace(self, label: str, subject: str):
+        spans = []
+        token = _CURRENT_TRACE.set(spans)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            _CURRENT_TRACE.reset(token)
+            self._record(label, total)
+            stages = {}  # per-frame stages are summed: name -> [count, seconds]
+            for stage, elapsed in spans:
+                entry = stages.setdefault(stage, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+            logger.info(
+                "[HEIC timing] %s %s: %s total=%.1fms",
+                label,
+                subject,
+                " ".join(
+                    f"{stage}={seconds * 1000:.1f}ms" + (f"(x{count})" if count > 1 else "")
+                    for stage, (count, seconds) in stages.items()
+                ),
+                total * 1000,
+            )
+
+    def _record(self, stage: str, elapsed: float) -> None:
+        with self._lock:
+            entry = self._totals.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        spans = _CURRENT_TRACE.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+    def snapshot(self) -> dict:
+        """{stage: {"count", "total_ms", "max_ms"}} since startup."""
+        with self._lock:
+            return {
+                stage: {"count": count, "total_ms": total * 1000, "max_ms": peak * 1000}
+                for stage, (count, total, peak) in sorted(self._totals.items())
+            }
+
+
+_TIMINGS = _StageTimings(TIMING)
+
+
+class _Histogram:
+    """Latency histogram with fixed, cumulative Prometheus-style buckets (seconds)."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)  # observations <= each bound
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class _NodeMetrics:
+    """Always-on counters and latency histograms behind /heic_stats and /heic_metrics.
+
+    Counters are keyed by (name, label value), e.g. ("decodes", "heif"). Unlike the
+    optional stage timings this only costs a counter update per call.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, label: str = "", value: int = 1) -> None:
+        with self._lock:
+            key = (name, label)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timed(self, name: str):
+        """Observe the block's duration in histogram ``name``; count failures as errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(name + "_errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def histograms(self) -> dict:
+        """{name: {"buckets": {bound: cumulative count}, "count", "sum_seconds"}}."""
+        with self._lock:
+            return {
+                name: {
+                    "buckets": dict(zip((str(b) for b in h.BUCKETS), h.counts)),
+                    "count": h.count,
+                    "sum_seconds": h.sum,
+                }
+                for name, h in self._histograms.items()
+            }
+
+
+_METRICS = _NodeMetrics()
+
+
+class _PreviewPoolBusy(Exception):
+    """Raised when all preview workers are busy and the wait queue is full."""
+
+
+class _NoEmbeddedThumbnail(LookupError):
+    """Raised for thumbnail=only previews of files without a usable embedded thumbnail."""
+
+
+class _PreviewWorkerPool:
+    """Bounded thread pool for preview decode/encode jobs.
+
+    At most ``workers`` jobs run at once and at most ``queue_size`` more may wait;
+    anything beyond that is rejected with :class:`_PreviewPoolBusy` instead of piling up.
+    Background jobs (pre-warming) run one at a time, only on an idle worker, and do not
+    count against the queue that requests share.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._background = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, background: bool) -> None:
+        with self._lock:
+            self._pending -= 1
+            if background:
+                self._background -= 1
+
+    def submit(self, fn, *args, background: bool = False):
+        """Submit ``fn(*args)``; returns a concurrent future or raises _PreviewPoolBusy."""
+        with self._lock:
+            if background:
+                if self._background or self._pending >= self.workers:
+                    raise _PreviewPoolBusy()
+                self._background += 1
+            elif self._pending - self._background >= self.workers + self.queue_size:
+                raise _PreviewPoolBusy()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="heic_preview"
+                )
+            executor = self._executor
+        try:
+            # Run in a copy of the caller's context so timing spans join the request's trace.
+            future = executor.submit(contextvars.copy_context().run, fn, *args)
+        except Exception:
+            self._release(background)
+            raise
+        # Release the slot when the job really finishes, even if the request was cancelled.
+        future.add_done_callback(lambda _future: self._release(background))
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+_PREVIEW_POOL = _PreviewWorkerPool(PREVIEW_WORKERS, PREVIEW_QUEUE_SIZE)
+
+
+class _PreviewDiskCache:
+    """Encoded previews stored under ComfyUI's temp directory, evicted LRU by total bytes.
+
+    Keys are derived from the source file identity (path, size, mtime) and the requested
+    variant, so an edited or replaced file never hits a stale entry.
+    """
+
+    SUFFIX = ".preview"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._dir = None
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    @staticmethod
+    def make_key(image_path: str, st: os.stat_result, *variant) -> str:
+        ident = (os.path.abspath(image_path), st.st_size, st.st_mtime_ns, variant)
+        return hashlib.sha1(repr(ident).encode("utf-8")).hexdigest()
+
+    def _directory(self) -> str:
+        # Called with the lock held. Rebuilds the LRU order from file mtimes, which
+        # get() refreshes on every hit.
+        if self._dir is None:
+            folder_paths, _ = _get_comfy_modules()
+            cache_dir = os.path.join(folder_paths.get_temp_directory(), "heic_preview")
+            os.makedirs(cache_dir, exist_ok=True)
+            found = []
+            with os.scandir(cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(self.SUFFIX) and entry.is_file():
+                        st = entry.stat()
+                        found.append((st.st_mtime_ns, entry.name[: -len(self.SUFFIX)], st.st_size))
+            for _, key, size in sorted(found):
+                self._entries[key] = size
+                self._total += size
+            self._dir = cache_dir
+            self._evict()
+        return self._dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, key + self.SUFFIX)
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                self._directory()
+            except OSError:
+                return None
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total -= size
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                cache_dir = self._directory()
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(cache_dir, key + self.SUFFIX))
+        except OSError:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old
+            self._entries[key] = len(data)
+            self._total += len(data)
+            self._evict()
+
+
+_PREVIEW_CACHE = _PreviewDiskCache(PREVIEW_CACHE_MB * 1024 * 1024)
+
+
+def _parse_preview_box(query) -> tuple[int, int] | None:
+    """Return the (width, height) box requested via max_side/w/h, or None for full size.
+
+    Raises ValueError for malformed or non-positive values.
+    """
+    limits = {}
+    for key in ("max_side", "w", "h"):
+        value = query.get(key)
+        if value is None or value == "":
+            continue
+        limits[key] = int(value)
+        if limits[key] <= 0:
+            raise ValueError(f"{key} must be a positive integer")
+    if not limits:
+        return None
+
+    unbounded = 1 << 30
+    max_side = limits.get("max_side", unbounded)
+    return (min(max_side, limits.get("w", unbounded)), min(max_side, limits.get("h", unbounded)))
+
+
+def _parse_preview_format(query, accept: str) -> tuple[str, bool, int]:
+    """Return (format, webp_accepted, quality) requested via format/quality and Accept.
+
+    ``format`` defaults to "auto", which is resolved once the image is decoded (see
+    :func:`_encode_preview`). Raises ValueError for unknown formats or bad quality.
+    """
+    fmt = (query.get("format") or "auto").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in PREVIEW_FORMATS:
+        raise ValueError(f"unsupported format: {fmt}")
+    quality = int(query.get("quality") or PREVIEW_QUALITY)
+    if not 1 <= quality <= 100:
+        raise ValueError("quality must be between 1 and 100")
+    return fmt, "image/webp" in (accept or ""), quality
+
+
+def _parse_preview_thumbnail(query) -> str:
+    mode = (query.get("thumbnail") or "auto").lower()
+    if mode not in PREVIEW_THUMBNAIL_MODES:
+        raise ValueError(f"unsupported thumbnail mode: {mode}")
+    return mode
+
+
+def _has_alpha(img: Image.Image) -> bool:
+    if img.mode == "P":
+        return "transparency" in img.info
+    if "A" not in img.getbands():
+        return False
+    # Photos saved as RGBA are usually fully opaque; treat those as RGB.
+    return img.getchannel("A").getextrema()[0] < 255
+
+
+def _encode_preview(img: Image.Image, fmt: str, webp_ok: bool, quality: int) -> bytes:
+    """Encode a decoded preview; opaque images are sent as RGB, never RGBA.
+
+    "auto" picks JPEG for opaque images (by far the fastest encoder) and WebP or PNG
+    for images with transparency. JPEG requests for images with alpha fall back to PNG.
+    """
+    alpha = _has_alpha(img)
+    if fmt == "auto":
+        fmt = ("webp" if webp_ok else "png") if alpha else "jpeg"
+    elif fmt == "jpeg" and alpha:
+        fmt = "png"
+    img = img.convert("RGBA" if alpha else "RGB")
+
+    bio = BytesIO()
+    if fmt == "jpeg":
+        img.save(bio, format="JPEG", quality=quality)
+    elif fmt == "webp":
+        # method=0 is several times faster than the default and barely larger.
+        img.save(bio, format="WEBP", quality=quality, method=0)
+    else:
+        img.save(bio, format="PNG")
+    return bio.getvalue()
+
+
+def _sniff_content_type(data: bytes) -> str:
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:2] == b"\xff\xd8":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def _shrink_to_box(img: Image.Image, box: tuple[int, int]) -> Image.Image:
+    """Downscale ``img`` to fit ``box`` (in display orientation) before EXIF transpose.
+
+    ``Image.thumbnail`` lets the codec decode at reduced size (``draft``) and uses
+    ``reduce`` for cheap integer downscaling before the final resample.
+    """
+    orientation = img.getexif().get(0x0112, 1)
+    if orientation in (5, 6, 7, 8):
+        box = (box[1], box[0])
+    if img.mode in ("1", "P"):
+        img = img.convert("RGBA")
+    if img.mode.startswith("I;16"):
+        # thumbnail() reduces first, which the 16-bit integer modes do not support.
+        scale = min(box[0] / img.width, box[1] / img.height)
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.Resampling.BICUBIC)
+        return img
+    img.thumbnail(box, Image.Resampling.BICUBIC, reducing_gap=2.0)
+    return img
+
+
+def _embedded_thumbnail(image_path: str, box: tuple[int, int] | None, any_size: bool = False):
+    """Smallest embedded HEIF thumbnail covering ``box``, as a PIL image, or None.
+
+    Phones store a small JPEG/HEVC thumbnail next to the primary image; decoding it takes
+    milliseconds instead of seconds. libheif applies the thumbnail's own rotation and
+    mirroring, so it is upright like the primary image. Thumbnails with another mode or
+    aspect ratio (a different crop) are ignored. With ``any_size`` the largest one is
+    returned when none covers ``box``.
+    """
+    from pillow_heif import open_heif  # type: ignore
+
+    heif_file = open_heif(image_path)
+    primary = heif_file[heif_file.primary_index]
+    if not hasattr(primary, "get_thumbnail"):
+        # Older pillow_heif releases list thumbnails but cannot decode them.
+        return None
+
+    width, height = primary.size
+    candidates = []
+    for index in range(len(primary.info.get("thumbnails", []))):
+        thumb = primary.get_thumbnail(index)
+        t_width, t_height = thumb.size
+        if thumb.mode != primary.mode or abs(t_width * height - t_height * width) > 2 * max(width, height):
+            continue
+        candidates.append(thumb)
+    if not candidates:
+        return None
+    candidates.sort(key=lambda t: t.size[0] * t.size[1])
+
+    # Size of the preview a full decode would produce.
+    scale = 1.0 if box is None else min(box[0] / width, box[1] / height, 1.0)
+    needed = (round(width * scale), round(height * scale))
+    for thumb in candidates:
+        if thumb.size[0] >= needed[0] and thumb.size[1] >= needed[1]:
+            return thumb.to_pillow()
+    return candidates[-1].to_pillow() if any_size else None
+
+
+def _render_preview(
+    image_path: str,
+    box: tuple[int, int] | None = None,
+    fmt: str = "png",
+    webp_ok: bool = False,
+    quality: int = PREVIEW_QUALITY,
+    thumbnail: str = "auto",
+) -> bytes:
+    """Decode an image and encode a browser-friendly preview (runs on a preview worker).
+
+    ``thumbnail`` is one of ``PREVIEW_THUMBNAIL_MODES``; "only" raises
+    ``_NoEmbeddedThumbnail`` instead of decoding the full image.
+    """
+    if thumbnail != "off" and _is_heic_path(image_path):
+        try:
+            with _TIMINGS.span("preview.thumbnail"):
+                thumb = _embedded_thumbnail(image_path, box, any_size=thumbnail == "only")
+        except Exception:
+            # Unreadable thumbnail boxes: the full decode below reports real errors.
+            thumb = None
+        if thumb is not None:
+            if box is not None:
+                with _TIMINGS.span("preview.resize"):
+                    thumb.thumbnail(box, Image.Resampling.BICUBIC, reducing_gap=2.0)
+            with _TIMINGS.span("preview.encode"):
+                return _encode_preview(thumb, fmt, webp_ok, quality)
+    if thumbnail == "only":
+        raise _NoEmbeddedThumbnail(f"no embedded thumbnail in {os.path.basename(image_path)}")
+
+    _try_register_heif_opener()
+    with _TIMINGS.span("preview.open"):
+        img = Image.open(image_path)
+    with img:
+        # Pillow decodes lazily; both branches make the decode happen inside the span.
+        if box is not None:
+            with _TIMINGS.span("preview.decode_resize"):
+                img = _shrink_to_box(img, box)
+        else:
+            with _TIMINGS.span("preview.decode"):
+                img.load()
+        with _TIMINGS.span("preview.exif_transpose"):
+            img = ImageOps.exif_transpose(img)
+        with _TIMINGS.span("preview.encode"):
+            return _encode_preview(img, fmt, webp_ok, quality)
+
+
+# The variant the frontend requests for node thumbnails (see PREVIEW_MAX_SIDE in
+# web/heic_upload.js); pre-warming renders exactly this one.
+PREWARM_VARIANT = ((1024, 1024), "auto", True, PREVIEW_QUALITY, "auto")
+
+
+def _prewarm_preview(image_path: str, st: os.stat_result) -> None:
+    """Render the node-thumbnail preview into the disk cache if a worker is free."""
+    cache_key = _PREVIEW_CACHE.make_key(image_path, st, *PREWARM_VARIANT)
+    if cache_key in _PREVIEW_CACHE:
+        return
+    try:
+        _PREVIEW_POOL.submit(_render_preview_cached, image_path, PREWARM_VARIANT, cache_key, background=True)
+    except _PreviewPoolBusy:
+        pass
+
+
+def _preview_not_modified(request, etag: str, mtime: int) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the preview validators."""
+    if_none_match = request.if_none_match
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 prescribes for If-None-Match.
+        return any(tag.value in ("*", etag) for tag in if_none_match)
+    if_modified_since = request.if_modified_since
+    if if_modified_since is not None:
+        return mtime <= if_modified_since.timestamp()
+    return False
+
+
+def _render_preview_cached(image_path: str, variant: tuple, cache_key: str) -> bytes:
+    body = _render_preview(image_path, *variant)
+    with _TIMINGS.span("preview.cache_write"):
+        _PREVIEW_CACHE.put(cache_key, body)
+    return body
+
+
+def _cache_stats(cache) -> dict:
+    lookups = cache.hits + cache.misses
+    return {
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": cache.hits / lookups if lookups else None,
+        "bytes": cache.total_bytes,
+        "max_bytes": cache.max_bytes,
+    }
+
+
+def _pillow_heif_version():
+    """Installed pillow_heif version, or None when it cannot be imported."""
+    try:
+        import pillow_heif  # type: ignore
+    except Exception:
+        return None
+    return getattr(pillow_heif, "__version__", "unknown")
+
+
+def _heic_stats() -> dict:
+    """Snapshot served by /heic_stats (JSON) and /heic_metrics (Prometheus text)."""
+    counters = _METRICS.counters()
+
+    def labelled(name: str) -> dict:
+        return {label: value for (n, label), value in counters.items() if n == name}
+
+    version = _pillow_heif_version()
+    return {
+        "pillow_heif": {"available": version is not None, "version": version},
+        "decodes": labelled("decodes"),
+        "decode_fallbacks": counters.get(("decode_fallbacks", ""), 0),
+        "load_image_errors": counters.get(("load_image_errors", ""), 0),
+        "preview_responses": labelled("preview_responses"),
+        "preview_bytes_served": counters.get(("preview_bytes_served", ""), 0),
+        "latency": _METRICS.histograms(),
+        "tensor_cache": _cache_stats(_TENSOR_CACHE),
+        "preview_cache": _cache_stats(_PREVIEW_CACHE),
+        "preview_pool": {
+            "workers": _PREVIEW_POOL.workers,
+            "queue_size": _PREVIEW_POOL.queue_size,
+            "pending": _PREVIEW_POOL.pending,
+        },
+        "stages": _TIMINGS.snapshot(),
+    }
+
+
+def _format_prometheus(stats: dict) -> str:
+    """Render a :func:`_heic_stats` snapshot in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples) -> None:
+        name = "comfyui_heic_" + name
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}" if labels else f"{name}{suffix} {value}")
+
+    heif = stats["pillow_heif"]
+    metric(
+        "pillow_heif_available",
+        "gauge",
+        "1 if pillow_heif can be imported.",
+        [("", {"version": heif["version"] or ""}, int(heif["available"]))],
+    )
+    metric(
+        "decodes_total",
+        "counter",
+        "Images decoded, by decode path.",
+        [("", {"path": path}, n) for path, n in sorted(stats["decodes"].items())],
+    )
+    metric(
+        "decode_fallbacks_total",
+        "counter",
+        "HEIF images the native path could not decode (retried through PIL).",
+        [("", {}, stats["decode_fallbacks"])],
+    )
+    metric(
+        "load_image_errors_total",
+        "counter",
+        "Load Image (HEIC) calls that raised.",
+        [("", {}, stats["load_image_errors"])],
+    )
+    metric(
+        "preview_responses_total",
+        "counter",
+        "/heic_preview responses, by HTTP status.",
+        [("", {"status": status}, n) for status, n in sorted(stats["preview_responses"].items())],
+    )
+    metric(
+        "preview_bytes_served_total",
+        "counter",
+        "Preview body bytes sent.",
+        [("", {}, stats["preview_bytes_served"])],
+    )
+    for name, histogram in sorted(stats["latency"].items()):
+        samples = [("_bucket", {"le": le}, n) for le, n in histogram["buckets"].items()]
+        samples.append(("_bucket", {"le": "+Inf"}, histogram["count"]))
+        samples.append(("_sum", {}, histogram["sum_seconds"]))
+        samples.append(("_count", {}, histogram["count"]))
+        metric(f"{name}_seconds", "histogram", f"Latency of {name} calls.", samples)
+    for cache in ("tensor_cache", "preview_cache"):
+        metric(f"{cache}_hits_total", "counter", f"{cache} hits.", [("", {}, stats[cache]["hits"])])
+        metric(f"{cache}_misses_total", "counter", f"{cache} misses.", [("", {}, stats[cache]["misses"])])
+        metric(f"{cache}_bytes", "gauge", f"{cache} size in bytes.", [("", {}, stats[cache]["bytes"])])
+    pool = stats["preview_pool"]
+    metric("preview_pending", "gauge", "Preview jobs running or queued.", [("", {}, pool["pending"])])
+    metric("preview_workers", "gauge", "Preview worker threads.", [("", {}, pool["workers"])])
+    if stats["stages"]:
+        stages = sorted(stats["stages"].items())
+        metric(
+            "stage_seconds_total",
+            "counter",
+            "Time spent per stage (COMFYUI_HEIC_TIMING).",
+            [("", {"stage": stage}, t["total_ms"] / 1000) for stage, t in stages],
+        )
+        metric(
+            "stage_calls_total",
+            "counter",
+            "Calls per stage (COMFYUI_HEIC_TIMING).",
+            [("", {"stage": stage}, t["count"]) for stage, t in stages],
+        )
+    return "\n".join(lines) + "\n"
+
+
 def _register_preview_route_if_possible() -> None:
-    """Register /heic_preview once the PromptServer is available."""
+    """Register /heic_preview, /heic_stats and /heic_metrics once the PromptServer is available."""
     try:
-        from aiohttp import web
-        from io import BytesIO
+        # server first: outside ComfyUI this fails before aiohttp is imported for nothing.
         from server import PromptServer
+        from aiohttp import web
 
         instance = getattr(PromptServer, "instance", None)
         if instance is None or not hasattr(instance, "routes"):
@@ -26,6 +797,28 @@ def _register_preview_route_if_possible() -> None:
 
         @instance.routes.get("/heic_preview")
         async def heic_preview(request: web.Request):
+            with _METRICS.timed("preview"):
+                response = await _heic_preview(request)
+            _METRICS.inc("preview_responses", str(response.status))
+            if response.status == 200 and isinstance(response.body, bytes):
+                _METRICS.inc("preview_bytes_served", value=len(response.body))
+            return response
+
+        @instance.routes.get("/heic_stats")
+        async def heic_stats(request: web.Request):
+            return web.json_response(_heic_stats(), headers={"Cache-Control": "no-store"})
+
+        @instance.routes.get("/heic_metrics")
+        async def heic_metrics(request: web.Request):
+            return web.Response(
+                body=_format_prometheus(_heic_stats()).encode("utf-8"),
+                headers={
+                    "Content-Type": "text/plain; version=0.0.4; charset=utf-8",
+                    "Cache-Control": "no-store",
+                },
+            )
+
+        async def _heic_preview(request: web.Request):
             filename = request.rel_url.query.get("filename")
             if not filename:
                 return web.Response(status=400, text="filename is required")
@@ -34,18 +827,61 @@ def _register_preview_route_if_possible() -> None:
             if not folder_paths.exists_annotated_filepath(filename):
                 return web.Response(status=404, text="file not found")
 
+            try:
+                box = _parse_preview_box(request.rel_url.query)
+                fmt, webp_ok, quality = _parse_preview_format(
+                    request.rel_url.query, request.headers.get("Accept", "")
+                )
+                thumbnail = _parse_preview_thumbnail(request.rel_url.query)
+            except ValueError as e:
+                return web.Response(status=400, text=str(e))
+
             image_path = folder_paths.get_annotated_filepath(filename)
-            _try_register_heif_opener()
             try:
-                img = Image.open(image_path)
-                img = ImageOps.exif_transpose(img)
-                img = img.convert("RGBA")
+                st = os.stat(image_path)
+            except OSError:
+                return web.Response(status=404, text="file not found")
+
+            variant = (box, fmt, webp_ok, quality, thumbnail)
+            cache_key = _PREVIEW_CACHE.make_key(image_path, st, *variant)
+            mtime = int(st.st_mtime)
+            # Revalidate on every use: the same filename may be overwritten by a new upload.
+            headers = {"Cache-Control": "private, no-cache", "Vary": "Accept"}
+            if _preview_not_modified(request, cache_key, mtime):
+                response = web.Response(status=304, headers=headers)
+                response.etag = cache_key
+                response.last_modified = mtime
+                return response
+
+            loop = asyncio.get_running_loop()
+            try:
+                with _TIMINGS.trace("heic_preview", filename):
+                    with _TIMINGS.span("preview.cache_read"):
+                        body = await loop.run_in_executor(None, _PREVIEW_CACHE.get, cache_key)
+                    if body is None:
+                        # Wall time including the wait for a worker; the worker's own
+                        # stages (open, decode_resize, encode, ...) are logged as well.
+                        with _TIMINGS.span("preview.render"):
+                            body = await _PREVIEW_POOL.run(
+                                _render_preview_cached, image_path, variant, cache_key
+                            )
+            except _PreviewPoolBusy:
+                return web.Response(
+                    status=503,
+                    text="preview workers are busy, try again",
+                    headers={"Retry-After": "1"},
+                )
+            except _NoEmbeddedThumbnail as e:
+                return web.Response(status=404, text=str(e), headers=headers)
             except Exception as e:
                 return web.Response(status=500, text=f"failed to decode image: {e}")
 
-            bio = BytesIO()
-            img.save(bio, format="PNG")
-            return web.Response(body=bio.getvalue(), content_type="image/png")
+            response = web.Response(
+                body=body, content_type=_sniff_content_type(body), headers=headers
+            )
+            response.etag = cache_key
+            response.last_modified = mtime
+            return response
     except Exception:
         return
 
@@ -62,15 +898,21 @@ def _get_comfy_modules():
     return folder_paths, node_helpers
 
 
+_HEIF_OPENER_REGISTERED: bool | None = None  # None until the first attempt
+
+
 def _try_register_heif_opener() -> bool:
-    """Register HEIF/HEIC opener for Pillow. Returns True if available."""
-    try:
-        from pillow_heif import register_heif_opener  # type: ignore
+    """Register HEIF/HEIC opener for Pillow once. Returns True if available."""
+    global _HEIF_OPENER_REGISTERED
+    if _HEIF_OPENER_REGISTERED is None:
+        try:
+            from pillow_heif import register_heif_opener  # type: ignore
 
-        register_heif_opener()
-        return True
-    except Exception:
-        return False
+            register_heif_opener()
+            _HEIF_OPENER_REGISTERED = True
+        except Exception:
+            _HEIF_OPENER_REGISTERED = False
+    return _HEIF_OPENER_REGISTERED
 
 
 def _is_heic_path(name: str) -> bool:
@@ -78,164 +920,1121 @@ def _is_heic_path(name: str) -> bool:
     return ext.lower() in HEIC_EXTS
 
 
+# Support all common image formats + HEIC
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".heic", ".heif", ".bmp", ".gif"}
+
+
+class _DirectoryIndex:
+    """Cached listing of the image files in one directory.
+
+    The directory is rescanned only when its mtime changes. Scans use ``os.scandir``,
+    filter by extension before asking for the entry type (which comes from the dirent,
+    so no per-file stat on most filesystems), and re-sort only when the set of files
+    actually changed.
+    """
+
+    # A directory modified this recently may change again within the same mtime tick.
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dir = None
+        self._mtime_ns = None
+        self._names = frozenset()
+        self._sorted = {}  # frozenset of extensions -> sorted names
+        self._watched = None  # directory kept current by an _InputWatcher
+
+    def _stale(self, directory: str, st: os.stat_result) -> bool:
+        return (
+            directory != self._dir
+            or st.st_mtime_ns != self._mtime_ns
+            or time.time_ns() - st.st_mtime_ns < self.RACY_WINDOW_NS
+        )
+
+    def _rescan(self, directory: str, mtime_ns: int) -> None:
+        names = set()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS and entry.is_file():
+                    names.add(entry.name)
+        if directory != self._dir:
+            self._names = frozenset()
+            self._sorted = {}
+        self._set_names(names)
+        self._dir = directory
+        self._mtime_ns = mtime_ns
+
+    def _set_names(self, names) -> None:
+        if names != self._names:
+            self._names = frozenset(names)
+            self._sorted = {}
+
+    def refresh(self, directory: str) -> set[str]:
+        """Rescan ``directory`` if it changed; returns the names that were added."""
+        st = os.stat(directory)
+        with self._lock:
+            before = self._names if directory == self._dir else frozenset()
+            if self._stale(directory, st):
+                self._rescan(directory, st.st_mtime_ns)
+            return set(self._names - before)
+
+    def update(self, directory: str, added=(), removed=()) -> None:
+        """Apply create/delete/rename events reported by a watcher."""
+        with self._lock:
+            if directory != self._dir:
+                return
+            names = set(self._names).difference(removed)
+            names.update(f for f in added if os.path.splitext(f)[1].lower() in IMAGE_EXTS)
+            self._set_names(names)
+
+    def watch(self, directory: str) -> None:
+        """Trust events for ``directory`` instead of checking its mtime on every list()."""
+        with self._lock:
+            self._watched = directory
+
+    def list(self, directory: str, exts=IMAGE_EXTS) -> list[str]:
+        with self._lock:
+            if directory != self._watched or directory != self._dir:
+                st = os.stat(directory)
+                if self._stale(directory, st):
+                    self._rescan(directory, st.st_mtime_ns)
+            key = frozenset(exts)
+            out = self._sorted.get(key)
+            if out is None:
+                out = sorted(f for f in self._names if os.path.splitext(f)[1].lower() in key)
+                self._sorted[key] = out
+            return list(out)
+
+
+_INPUT_INDEX = _DirectoryIndex()
+
+
+class _InputWatcher:
+    """Keeps a _DirectoryIndex current from a background thread.
+
+    Uses watchdog (inotify, FSEvents, ReadDirectoryChangesW) when it is installed for
+    immediate updates, and checks the directory mtime every ``interval`` seconds in any
+    case to catch what the events miss. Newly arrived HEIC/HEIF files get their node
+    preview pre-rendered once they stop changing, so a file still being uploaded is not
+    decoded half-written.
+    """
+
+    def __init__(self, index: _DirectoryIndex, directory: str, interval: int):
+        self.index = index
+        self.directory = directory
+        self.interval = interval
+        self._observer = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    def start(self) -> None:
+        self.index.refresh(self.directory)
+        try:
+            self._observer = self._start_watchdog()
+        except Exception:
+            self._observer = None
+        self.index.watch(self.directory)
+        threading.Thread(target=self._run, name="heic_input_watcher", daemon=True).start()
+
+    def _start_watchdog(self):
+        from watchdog.events import FileSystemEventHandler  # type: ignore
+        from watchdog.observers import Observer  # type: ignore
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher._on_change(added=[event.src_path])
+
+            def on_deleted(self, event):
+                if not event.is_directory:
+                    watcher._on_change(removed=[event.src_path])
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    watcher._on_change(added=[event.dest_path], removed=[event.src_path])
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.directory, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _names_in_directory(self, paths) -> list[str]:
+        directory = os.path.abspath(self.directory)
+        return [
+            os.path.basename(p)
+            for p in map(os.fsdecode, paths)
+            if os.path.dirname(os.path.abspath(p)) == directory
+        ]
+
+    def _on_change(self, added=(), removed=()) -> None:
+        added = self._names_in_directory(added)
+        self.index.update(self.directory, added, self._names_in_directory(removed))
+        self._queue_prewarm(added)
+
+    def _queue_prewarm(self, names) -> None:
+        if not _PREVIEW_CACHE.enabled:
+            return
+        with self._pending_lock:
+            self._pending.update(n for n in names if _is_heic_path(n))
+
+    def _prewarm_settled(self) -> None:
+        with self._pending_lock:
+            pending = list(self._pending)
+        for name in pending:
+            image_path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(image_path)
+            except OSError:
+                st = None
+            if st is not None and time.time() - st.st_mtime < self.interval:
+                continue  # still being written
+            with self._pending_lock:
+                self._pending.discard(name)
+            if st is not None:
+                _prewarm_preview(image_path, st)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                # Also with watchdog: inotify misses changes made by other hosts on network
+                # mounts, and the refresh is a single stat() while the mtime is unchanged.
+                self._queue_prewarm(self.index.refresh(self.directory))
+                self._prewarm_settled()
+            except Exception:
+                pass
+
+
+_INPUT_WATCHER = None
+_INPUT_WATCHER_LOCK = threading.Lock()
+
+
+def _start_input_watcher_if_enabled() -> None:
+    """Start the input directory watcher once, if COMFYUI_HEIC_WATCH_INPUT is set."""
+    global _INPUT_WATCHER
+    if not WATCH_INPUT:
+        return
+    with _INPUT_WATCHER_LOCK:
+        if _INPUT_WATCHER is not None:
+            return
+        try:
+            folder_paths, _ = _get_comfy_modules()
+            _INPUT_WATCHER = _InputWatcher(
+                _INPUT_INDEX, folder_paths.get_input_directory(), WATCH_INTERVAL
+            )
+            _INPUT_WATCHER.start()
+        except Exception:
+            return
+
+
 def _list_heic_files_in_input_dir() -> list[str]:
     folder_paths, _ = _get_comfy_modules()
-    input_dir = folder_paths.get_input_directory()
     try:
-        files = [
-            f
-            for f in os.listdir(input_dir)
-            if os.path.isfile(os.path.join(input_dir, f))
-        ]
+        return _INPUT_INDEX.list(folder_paths.get_input_directory(), HEIC_EXTS)
     except Exception:
         return []
 
-    allowed_ext = {".heic", ".heif"}
-    out = []
-    for f in files:
-        _, ext = os.path.splitext(f)
-        if ext.lower() in allowed_ext:
-            out.append(f)
-
-    return sorted(out)
-
 
 def _list_image_files_in_input_dir() -> list[str]:
     """Return all supported image files (PNG, JPG, WEBP, HEIC/HEIF)."""
     folder_paths, _ = _get_comfy_modules()
-    input_dir = folder_paths.get_input_directory()
     try:
-        files = [
-            f
-            for f in os.listdir(input_dir)
-            if os.path.isfile(os.path.join(input_dir, f))
-        ]
+        return _INPUT_INDEX.list(folder_paths.get_input_directory())
     except Exception:
         return []
 
-    # Support all common image formats + HEIC
-    allowed_ext = {".png", ".jpg", ".jpeg", ".webp", ".heic", ".heif", ".bmp", ".gif"}
-    out = []
-    for f in files:
-        _, ext = os.path.splitext(f)
-        if ext.lower() in allowed_ext:
-            out.append(f)
 
-    return sorted(out)
+class _TensorLRUCache:
+    """Process-wide LRU of decoded node outputs (tuples of tensors), bounded by bytes.
+
+    The cache keeps its own copy and hands out clones: a hit still skips the decode, but
+    callers across nodes and prompts never share tensors they might modify in place.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size in bytes)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _nbytes(value) -> int:
+        return sum(t.element_size() * t.nelement() for t in value)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return tuple(t.clone() for t in value)
+
+    def put(self, key, value) -> None:
+        size = self._nbytes(value)
+        if size > self.max_bytes:
+            return
+        value = tuple(t.clone() for t in value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            self._entries[key] = (value, size)
+            self._total += size
+            while self._total > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+
+_TENSOR_CACHE = _TensorLRUCache(TENSOR_CACHE_MB * 1024 * 1024)
+
+
+_CONTENT_HASHES = {}  # abspath -> (stat fingerprint, sha256 hex digest)
+_CONTENT_HASHES_LOCK = threading.Lock()
+
+
+def _file_fingerprint(image_path: str, strict: bool = False) -> str:
+    """Identify a file's current version for IS_CHANGED without reading it when possible."""
+    st = os.stat(image_path)
+    ident = (st.st_ino, st.st_size, st.st_mtime_ns)
+    if not strict:
+        return "{}:{}:{}".format(*ident)
+
+    path = os.path.abspath(image_path)
+    with _CONTENT_HASHES_LOCK:
+        cached = _CONTENT_HASHES.get(path)
+    if cached is not None and cached[0] == ident:
+        return cached[1]
+
+    m = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            m.update(chunk)
+    digest = m.digest().hex()
+    with _CONTENT_HASHES_LOCK:
+        _CONTENT_HASHES[path] = (ident, digest)
+    return digest
+
+
+# Names of the torch dtypes offered for the IMAGE output.
+# bfloat16 is not offered: Tensor.numpy() rejects it, so Save/Preview Image fail on it.
+OUTPUT_DTYPES = ("float32", "float16")
+
+
+def _output_dtype(name: str) -> torch.dtype:
+    if name not in OUTPUT_DTYPES:
+        raise ValueError(f"Unsupported dtype: {name} (expected one of {', '.join(OUTPUT_DTYPES)})")
+    return getattr(torch, name)
+
+
+_ZERO_MASK = None
+_ZERO_MASK_LOCK = threading.Lock()
+
+
+def _zero_mask() -> torch.Tensor:
+    """Placeholder mask of frames without transparency.
+
+    Frames are told apart by identity, so it is created once, on first use. It never
+    reaches an output: ``_stack_masks`` replaces it with zeros owned by each result,
+    because consumers may write into a mask through ``.numpy()``.
+    """
+    global _ZERO_MASK
+    if _ZERO_MASK is None:
+        with _ZERO_MASK_LOCK:
+            if _ZERO_MASK is None:
+                _ZERO_MASK = torch.zeros(()).expand(64, 64)
+    return _ZERO_MASK
+
+
+def _stack_masks(masks: list[torch.Tensor], height: int, width: int) -> torch.Tensor:
+    """Stack per-frame (H, W) masks into (B, H, W); ``_zero_mask()`` entries become zeros.
+
+    If no frame has a real mask the result is a fresh (B, 64, 64) zero placeholder.
+    """
+    zero = _zero_mask()
+    if all(mask is zero for mask in masks):
+        return torch.zeros((len(masks), 64, 64), dtype=torch.float32)
+    if len(masks) == 1:
+        return masks[0].unsqueeze(0)
+    # torch.stack copies, so the expanded zeros are not shared with the result.
+    zeros = zero[:1, :1].expand(height, width)
+    return torch.stack([zeros if mask is zero else mask for mask in masks])
+
+
+class _FrameBatch:
+    """Collects equally sized frames into one preallocated IMAGE tensor plus their masks."""
+
+    def __init__(self, n_frames: int, dtype: torch.dtype | None = None):
+        self.n_frames = n_frames
+        self.dtype = torch.float32 if dtype is None else dtype
+        self.image = None
+        self.masks = []
+        self.depths = []
+        self.count = 0
+        self._scratch = None  # one float32 frame, for dtypes NumPy cannot write
+
+    def accepts(self, width: int, height: int) -> bool:
+        """True if a frame of this size belongs to the batch (the first frame sets the size)."""
+        if self.image is None:
+            # One buffer for all frames; each frame is scaled straight into its slot.
+            self.image = torch.empty((self.n_frames, height, width, 3), dtype=self.dtype)
+            return True
+        return self.image.shape[1:3] == (height, width)
+
+    def add(
+        self,
+        rgb: np.ndarray,
+        mask: torch.Tensor,
+        max_value: float = 255.0,
+        depth: torch.Tensor | None = None,
+    ) -> None:
+        """Append an (H, W, 3) frame, scaled to [0, 1] in one pass, its mask and depth map.
+
+        ``max_value`` is the sample value that maps to 1.0 (255 for 8-bit data). An
+        (H, W) gray frame is scaled once and copied into all three channels.
+        """
+        slot = self.image[self.count]
+        if rgb.ndim == 2:
+            gray = torch.from_numpy(np.divide(rgb, np.float32(max_value), dtype=np.float32))
+            slot.copy_(gray.unsqueeze(-1).expand_as(slot))
+        elif self.dtype == torch.float32:
+            np.divide(rgb, np.float32(max_value), out=slot.numpy(), dtype=np.float32)
+        else:
+            # Scale in float32 once, then round into the narrower dtype.
+            if self._scratch is None:
+                self._scratch = torch.empty(slot.shape, dtype=torch.float32)
+            np.divide(rgb, np.float32(max_value), out=self._scratch.numpy(), dtype=np.float32)
+            slot.copy_(self._scratch)
+        self.masks.append(mask)
+        self.depths.append(_zero_mask() if depth is None else depth)
+        self.count += 1
+
+    def result(self, image: str):
+        if self.count == 0:
+            raise RuntimeError(f"No frames could be decoded from image: {image}")
+
+        output_image = self.image
+        if self.count < self.n_frames:
+            # Size-mismatched frames were skipped; a leading slice is a view, not a copy.
+            output_image = output_image[: self.count]
+
+        height, width = output_image.shape[1:3]
+        output_mask = _stack_masks(self.masks, height, width)
+        output_depth = _stack_masks(self.depths, height, width)
+        return (output_image, output_mask, output_depth)
+
+
+def _downscale_size(size, max_megapixels: float = 0.0, target_long_side: int = 0):
+    """Target (width, height) honouring both limits, or None when ``size`` already fits."""
+    width, height = size
+    scale = 1.0
+    if target_long_side > 0:
+        scale = min(scale, target_long_side / max(width, height))
+    if max_megapixels > 0:
+        scale = min(scale, (max_megapixels * 1_000_000 / (width * height)) ** 0.5)
+    if scale >= 1.0:
+        return None
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+def _downscale_frame(frame: Image.Image, target) -> Image.Image:
+    if frame.mode in ("1", "P"):
+        frame = frame.convert("RGBA" if "transparency" in frame.info else "RGB")
+    if frame.mode.startswith("I;16"):
+        # reduce() does not support the 16-bit integer modes.
+        return frame.resize(target, Image.Resampling.LANCZOS)
+    # reducing_gap=1.0: box-reduce() by the whole integer factor first (cheap and
+    # antialiased), leaving Lanczos less than a 2x step; 3-4x faster than gap 2.0.
+    return frame.resize(target, Image.Resampling.LANCZOS, reducing_gap=1.0)
+
+
+def _alpha_to_mask(alpha: np.ndarray, max_value: float = 255.0) -> torch.Tensor:
+    # One float32 allocation; "1 - alpha" is applied in place.
+    mask = np.divide(alpha, np.float32(max_value), dtype=np.float32)
+    np.subtract(np.float32(1.0), mask, out=mask)
+    return torch.from_numpy(mask)
+
+
+def _palette_mask(frame: Image.Image):
+    """Mask of a "P" frame from its transparency info, or None if it has none.
+
+    Equivalent to the alpha of ``convert("RGBA")`` without building the RGBA image:
+    a 256-entry mask table is indexed with the palette indices.
+    """
+    transparency = frame.info.get("transparency")
+    if transparency is None:
+        return None
+    if frame.palette is None or frame.palette.mode != "RGB":
+        # RGBA palettes carry their own alpha; let Pillow combine the two.
+        return _alpha_to_mask(np.asarray(frame.convert("RGBA").getchannel("A")))
+    alpha = np.full(256, 255, dtype=np.uint8)
+    if isinstance(transparency, int):
+        alpha[transparency] = 0
+    else:
+        values = np.frombuffer(transparency, dtype=np.uint8)[:256]
+        alpha[: len(values)] = values
+    table = _alpha_to_mask(alpha).numpy()
+    return torch.from_numpy(table[np.asarray(frame)])
+
+
+def _depth_to_mask(depth_images, size) -> torch.Tensor | None:
+    """First HEIF depth/disparity map scaled to [0, 1] at ``size`` (W, H), or None.
+
+    ``depth_images`` is pillow_heif's ``info["depth_images"]``; the map is decoded here,
+    from the already opened container, and resized to match the color frame.
+    """
+    if not depth_images:
+        return None
+    depth = depth_images[0]
+    arr = np.asarray(depth)[:, : depth.size[0]]
+    if arr.ndim == 3:
+        arr = arr[..., 0]
+    max_value = 255.0 if arr.dtype == np.uint8 else 65535.0
+    if depth.size != tuple(size):
+        arr = _resize_array(arr[..., None], size)[..., 0]
+    return torch.from_numpy(np.divide(arr, np.float32(max_value), dtype=np.float32))
+
+
+def _heif_max_value(heif_img) -> float:
+    """Sample value of full intensity in a decoded pillow_heif buffer.
+
+    10/12-bit images decode to ";16" modes with samples shifted into the high bits
+    (10-bit white is 1023 << 6 = 65472), so scaling by 65535 would never reach 1.0.
+    """
+    if not heif_img.mode.endswith(";16"):
+        return 255.0
+    bit_depth = int(heif_img.info.get("bit_depth", 16))
+    return float(((1 << bit_depth) - 1) << (16 - bit_depth))
+
+
+def _resize_array(arr: np.ndarray, target) -> np.ndarray:
+    """Antialiased resize of an (H, W, C) array of any dtype; returns float32 samples."""
+    t = torch.from_numpy(arr.astype(np.float32)).movedim(-1, 0).unsqueeze(0)
+    t = torch.nn.functional.interpolate(
+        t, size=(target[1], target[0]), mode="bilinear", align_corners=False, antialias=True
+    )
+    return t.squeeze(0).movedim(0, -1).numpy()
+
+
+class _InvalidFrameSelection(ValueError):
+    """Raised for malformed or out-of-range frame_index/frame_range inputs."""
+
+
+def _parse_frame_range(text: str) -> list[tuple[int, int | None]]:
+    """Parse a frame selection like "0,2,5-7" or "3-" into inclusive (first, last) spans.
+
+    ``last`` is None for an open span ("3-" = frame 3 to the end). Raises
+    ``_InvalidFrameSelection``.
+    """
+    spans = []
+    for part in (text or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            span = (int(first), (int(last) if last else None) if sep else int(first))
+        except ValueError:
+            raise _InvalidFrameSelection(f"Invalid frame range: {part!r} (expected e.g. 0,2,5-7 or 3-)")
+        if span[0] < 0 or (span[1] is not None and span[1] < span[0]):
+            raise _InvalidFrameSelection(f"Invalid frame range: {part!r}")
+        spans.append(span)
+    return spans
+
+
+def _select_frames(n_frames: int, frame_index: int = -1, frame_range: str = "") -> list[int]:
+    """Frame indices to decode: ``frame_index`` if >= 0, else ``frame_range``, else all."""
+    if frame_index >= 0:
+        spans = [(frame_index, frame_index)]
+    else:
+        spans = _parse_frame_range(frame_range)
+    if not spans:
+        return list(range(n_frames))
+
+    indices = []
+    for first, last in spans:
+        # An open span must still start inside the image ("1-" on a single frame).
+        last = max(first, n_frames - 1) if last is None else last
+        if last >= n_frames:
+            raise _InvalidFrameSelection(f"Frame {last} requested but the image has {n_frames} frame(s)")
+        indices.extend(k for k in range(first, last + 1) if k not in indices)
+    return indices
+
+
+def _load_heif_tensors(
+    image: str,
+    image_path: str,
+    max_megapixels: float = 0.0,
+    target_long_side: int = 0,
+    dtype: torch.dtype | None = None,
+    frame_index: int = -1,
+    frame_range: str = "",
+    load_depth: bool = False,
+):
+    """Decode a HEIF container with pillow_heif directly, without intermediate PIL images.
+
+    libheif already applies the container's rotation/mirror transforms and pillow_heif
+    resets the EXIF orientation, so no EXIF transpose is needed (the PIL path's
+    ``exif_transpose`` is a no-op for HEIF too). Returns None for pixel layouts this
+    path does not handle, so the caller can fall back to PIL.
+
+    10/12-bit images keep their full precision: they are decoded to 16-bit buffers and
+    normalized in the same single vectorized pass as 8-bit ones.
+
+    Top-level images are decoded lazily, so only the selected frames are decoded.
+    """
+    from pillow_heif import open_heif  # type: ignore
+
+    with _TIMINGS.span("decode.open"):
+        heif_file = open_heif(image_path, convert_hdr_to_8bit=False, hdr_to_16bit=True)
+    indices = _select_frames(len(heif_file), frame_index, frame_range)
+    batch = _FrameBatch(len(indices), dtype)
+
+    for heif_img in (heif_file[k] for k in indices):
+        if heif_img.mode not in ("RGB", "RGBA", "RGB;16", "RGBA;16"):
+            return None
+        width = heif_img.size[0]
+        target = _downscale_size(heif_img.size, max_megapixels, target_long_side)
+        if not batch.accepts(*(target or heif_img.size)):
+            continue
+
+        # Zero-copy view of the decoded buffer (rows may carry stride padding).
+        with _TIMINGS.span("decode.decode"):
+            arr = np.asarray(heif_img)[:, :width]
+        max_value = _heif_max_value(heif_img)
+        if target is not None:
+            # libheif has no scaled decode; shrink the buffer before the output conversion.
+            with _TIMINGS.span("decode.downscale"):
+                if arr.dtype == np.uint8:
+                    arr = np.asarray(_downscale_frame(Image.fromarray(arr), target))
+                else:
+                    # Pillow has no 16-bit RGB mode, so this resizes a full-size float32 copy.
+                    arr = _resize_array(arr, target)
+        with _TIMINGS.span("decode.mask"):
+            if arr.shape[2] == 4:
+                mask_t = _alpha_to_mask(arr[..., 3], max_value)
+            else:
+                mask_t = _zero_mask()
+        depth_t = None
+        if load_depth:
+            with _TIMINGS.span("decode.depth"):
+                depth_t = _depth_to_mask(heif_img.info.get("depth_images"), target or heif_img.size)
+        with _TIMINGS.span("decode.to_tensor"):
+            batch.add(arr[..., :3], mask_t, max_value, depth_t)
+
+    with _TIMINGS.span("decode.stack"):
+        return batch.result(image)
+
+
+def _load_image_tensors(
+    image: str,
+    image_path: str,
+    node_helpers,
+    max_megapixels: float = 0.0,
+    target_long_side: int = 0,
+    dtype: torch.dtype | None = None,
+    frame_index: int = -1,
+    frame_range: str = "",
+    load_depth: bool = False,
+):
+    """Decode ``image_path`` into ComfyUI (IMAGE, MASK, depth MASK) tensors.
+
+    ``max_megapixels`` / ``target_long_side`` (0 = off) downscale each frame before the
+    float conversion; 10/12-bit HEIF frames are resized from a full-size float32 copy. ``dtype`` is the IMAGE dtype; masks stay
+    float32. ``frame_index`` / ``frame_range`` pick frames (see ``_select_frames``).
+    With ``load_depth``, HEIF depth maps fill the third tensor; otherwise (and for
+    images without one) it is a zero placeholder like the mask of an opaque image.
+    """
+    if _is_heic_path(image):
+        try:
+            output = _load_heif_tensors(
+                image,
+                image_path,
+                max_megapixels,
+                target_long_side,
+                dtype,
+                frame_index,
+                frame_range,
+                load_depth,
+            )
+        except _InvalidFrameSelection:
+            raise  # the PIL path would reject the same selection
+        except Exception:
+            # Fall back to the PIL path, which reports decode errors to the user.
+            output = None
+        if output is not None:
+            _METRICS.inc("decodes", "heif")
+            return output
+        _METRICS.inc("decode_fallbacks")
+
+    try:
+        with _TIMINGS.span("decode.open"):
+            img = node_helpers.pillow(Image.open, image_path)
+    except Exception as e:
+        if _is_heic_path(image):
+            raise RuntimeError(
+                "Failed to open HEIC/HEIF image. Ensure pillow-heif is installed: pip install pillow-heif\n"
+                f"File: {image}\nError: {e}"
+            )
+        raise RuntimeError(f"Failed to open image: {image}\nError: {e}")
+
+    excluded_formats = ["MPO"]
+    # Only the first frame of excluded formats is returned, so don't decode the rest.
+    if getattr(img, "format", None) in excluded_formats:
+        n_frames = 1
+    else:
+        n_frames = getattr(img, "n_frames", 1)
+    indices = _select_frames(n_frames, frame_index, frame_range)
+    batch = _FrameBatch(len(indices), dtype)
+
+    draft_size = _downscale_size(img.size, max_megapixels, target_long_side)
+    if draft_size is not None:
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale directly (never below draft_size).
+        img.draft("RGB", draft_size)
+
+    for k in indices:
+        with _TIMINGS.span("decode.decode"):
+            img.seek(k)
+            # Decoding is lazy; load here so the spans below measure only their own work.
+            img.load()
+        with _TIMINGS.span("decode.exif_transpose"):
+            i = node_helpers.pillow(ImageOps.exif_transpose, img)
+
+        target = _downscale_size(i.size, max_megapixels, target_long_side)
+        if target is not None:
+            with _TIMINGS.span("decode.downscale"):
+                i = _downscale_frame(i, target)
+
+        with _TIMINGS.span("decode.convert"):
+            if i.mode == "I":
+                # Same values as i.point(lambda i: i * (1 / 255)).convert("RGB"), without
+                # building the two intermediate images; add() broadcasts gray to RGB.
+                rgb = np.asarray(i) // 255
+                np.clip(rgb, 0, 255, out=rgb)
+            else:
+                rgb = np.asarray(i.convert("RGB"))
+
+        if not batch.accepts(*i.size):
+            continue
+
+        with _TIMINGS.span("decode.mask"):
+            if "A" in i.getbands():
+                mask_t = _alpha_to_mask(np.asarray(i.getchannel("A")))
+            else:
+                mask_t = _palette_mask(i) if i.mode == "P" else None
+                if mask_t is None:
+                    mask_t = _zero_mask()
+
+        depth_t = None
+        if load_depth:
+            # The pillow_heif opener exposes the same depth maps for the current frame.
+            with _TIMINGS.span("decode.depth"):
+                depth_t = _depth_to_mask(img.info.get("depth_images"), i.size)
+
+        with _TIMINGS.span("decode.to_tensor"):
+            batch.add(rgb, mask_t, depth=depth_t)
+
+    _METRICS.inc("decodes", "pil")
+    with _TIMINGS.span("decode.stack"):
+        return batch.result(image)
 
 
 class LoadImagePlusHEIC:
     @classmethod
     def INPUT_TYPES(cls):
         _register_preview_route_if_possible()
+        _start_input_watcher_if_enabled()
         files = _list_image_files_in_input_dir()
         return {
             "required": {
                 "image": (files, {"image_upload": True}),
             },
+            "optional": {
+                # Downscale while decoding (0 = off); saves time and float32 memory.
+                "max_megapixels": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1024.0, "step": 0.1}),
+                "target_long_side": ("INT", {"default": 0, "min": 0, "max": 16384}),
+                # float16 halves IMAGE memory; see README for node compatibility.
+                "dtype": (
+                    list(OUTPUT_DTYPES),
+                    {
+                        "tooltip": "float16 halves IMAGE memory but breaks some nodes, "
+                        "e.g. Upscale Image with bilinear. Use float32 unless memory is tight."
+                    },
+                ),
+                # Decode only some frames of a burst/animation: one index (-1 = off) or
+                # a list of indices and inclusive ranges like "0,2,5-7" ("" = all frames).
+                "frame_index": ("INT", {"default": -1, "min": -1, "max": 65535}),
+                "frame_range": ("STRING", {"default": ""}),
+                # Fill the depth output from the HEIF depth/disparity map (iPhone portraits).
+                "load_depth": ("BOOLEAN", {"default": False}),
+            },
         }
 
     CATEGORY = "image"
 
-    RETURN_TYPES = ("IMAGE", "MASK")
+    RETURN_TYPES = ("IMAGE", "MASK", "MASK")
+    RETURN_NAMES = ("IMAGE", "MASK", "depth")
     FUNCTION = "load_image"
 
-    def load_image(self, image):
-        if _is_heic_path(image) and not _try_register_heif_opener():
-            raise RuntimeError(
-                "HEIC/HEIF support is not available. Install dependency: pip install pillow-heif"
+    def load_image(
+        self,
+        image,
+        max_megapixels=0.0,
+        target_long_side=0,
+        dtype="float32",
+        frame_index=-1,
+        frame_range="",
+        load_depth=False,
+    ):
+        with _METRICS.timed("load_image"), _TIMINGS.trace("load_image", image):
+            if _is_heic_path(image) and not _try_register_heif_opener():
+                raise RuntimeError(
+                    "HEIC/HEIF support is not available. Install dependency: pip install pillow-heif"
+                )
+            else:
+                _try_register_heif_opener()
+
+            folder_paths, node_helpers = _get_comfy_modules()
+
+            if not folder_paths.exists_annotated_filepath(image):
+                raise FileNotFoundError(f"Image not found in input path: {image}")
+
+            image_path = folder_paths.get_annotated_filepath(image)
+
+            st = os.stat(image_path)
+            cache_key = (
+                os.path.abspath(image_path),
+                st.st_size,
+                st.st_mtime_ns,
+                max_megapixels,
+                target_long_side,
+                dtype,
+                frame_index,
+                frame_range,
+                load_depth,
             )
-        else:
-            _try_register_heif_opener()
+            with _TIMINGS.span("load_image.cache_lookup"):
+                cached = _TENSOR_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
 
-        folder_paths, node_helpers = _get_comfy_modules()
+            output = _load_image_tensors(
+                image,
+                image_path,
+                node_helpers,
+                max_megapixels,
+                target_long_side,
+                _output_dtype(dtype),
+                frame_index,
+                frame_range,
+                load_depth,
+            )
+            _TENSOR_CACHE.put(cache_key, output)
+            return output
 
+    @classmethod
+    def IS_CHANGED(cls, image, **kwargs):
+        folder_paths, _ = _get_comfy_modules()
+        image_path = folder_paths.get_annotated_filepath(image)
+        return _file_fingerprint(image_path, strict=IS_CHANGED_MODE == "strict")
+
+    @classmethod
+    def VALIDATE_INPUTS(cls, image, frame_range=""):
+        folder_paths, _ = _get_comfy_modules()
         if not folder_paths.exists_annotated_filepath(image):
-            raise FileNotFoundError(f"Image not found in input path: {image}")
+            return "Invalid image file: {}".format(image)
+        try:
+            _parse_frame_range(frame_range)
+        except ValueError as e:
+            return str(e)
+        return True
 
-        image_path = folder_paths.get_annotated_filepath(image)
 
+def _resolve_input_subfolder(folder: str) -> str:
+    """Absolute path of ``folder`` inside the input directory; refuses to escape it."""
+    folder_paths, _ = _get_comfy_modules()
+    input_dir = os.path.abspath(folder_paths.get_input_directory())
+    path = os.path.abspath(os.path.join(input_dir, (folder or "").strip()))
+    if os.path.commonpath([input_dir, path]) != input_dir:
+        raise ValueError(f"Folder must be inside the input directory: {folder}")
+    return path
+
+
+def _check_glob_pattern(pattern: str) -> None:
+    """Refuse patterns that could match outside the folder they are applied to."""
+    pattern = pattern or ""
+    if os.path.isabs(pattern) or os.path.splitdrive(pattern)[0] or pattern.startswith(("/", "\\")):
+        raise ValueError(f"Pattern must be relative to the folder: {pattern}")
+    if ".." in pattern.replace("\\", "/").split("/"):
+        raise ValueError(f"Pattern must not contain '..': {pattern}")
+
+
+def _glob_image_files(base: str, pattern: str) -> list[str]:
+    """Supported image files under ``base`` matching ``pattern``, as sorted relative paths."""
+    _check_glob_pattern(pattern)
+    base = os.path.abspath(base)
+    names = glob.glob(pattern or "*", root_dir=base, recursive=True)
+    return sorted(
+        n
+        for n in names
+        if os.path.splitext(n)[1].lower() in IMAGE_EXTS
+        and os.path.commonpath([base, os.path.abspath(os.path.join(base, n))]) == base
+        and os.path.isfile(os.path.join(base, n))
+    )
+
+
+def _fit_batch(image: torch.Tensor, mask: torch.Tensor, width: int, height: int, mode: str):
+    """Resize (B, H, W, 3) images and their masks to ``width`` x ``height``.
+
+    "stretch" ignores the aspect ratio, "crop" fills the target and center-crops, "pad"
+    fits inside the target and pads with black; padded areas are masked (1.0).
+    """
+    b, h, w = image.shape[:3]
+    if mask.shape[1:] != (h, w):
+        # Frames without alpha carry a 64x64 placeholder mask.
+        mask = torch.zeros((b, h, w), dtype=torch.float32)
+    if (w, h) == (width, height):
+        return image, mask
+
+    if mode == "stretch":
+        new_w, new_h = width, height
+    else:
+        pick = max if mode == "crop" else min
+        scale = pick(width / w, height / h)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+
+    def _resize(t: torch.Tensor) -> torch.Tensor:
+        return torch.nn.functional.interpolate(
+            t, size=(new_h, new_w), mode="bilinear", align_corners=False, antialias=True
+        )
+
+    image = _resize(image.movedim(-1, 1)).movedim(1, -1).clamp_(0.0, 1.0)
+    mask = _resize(mask.unsqueeze(1)).squeeze(1).clamp_(0.0, 1.0)
+
+    if mode == "crop":
+        top, left = (new_h - height) // 2, (new_w - width) // 2
+        return (
+            image[:, top : top + height, left : left + width].contiguous(),
+            mask[:, top : top + height, left : left + width].contiguous(),
+        )
+    if mode == "pad":
+        top, left = (height - new_h) // 2, (width - new_w) // 2
+        padded = torch.zeros((b, height, width, 3), dtype=torch.float32)
+        padded[:, top : top + new_h, left : left + new_w] = image
+        padded_mask = torch.ones((b, height, width), dtype=torch.float32)
+        padded_mask[:, top : top + new_h, left : left + new_w] = mask
+        return padded, padded_mask
+    return image, mask
+
+
+def _load_fitted(name: str, image_path: str, node_helpers, size, mode: str):
+    """Decode one file and fit it to ``size``; returns the exception instead of raising."""
+    try:
+        image, mask, _ = _load_image_tensors(name, image_path, node_helpers)
+        return _fit_batch(image, mask, size[0], size[1], mode)
+    except Exception as e:
+        return e
+
+
+def _load_image_batch(base: str, names: list[str], width: int, height: int, mode: str, workers: int):
+    """Decode ``names`` (relative to ``base``) in parallel into one (IMAGE, MASK) batch.
+
+    Output order follows ``names``. Returns ``(image, mask, errors)`` where ``errors`` is a
+    list of ``(name, exception)`` for files that could not be decoded.
+    """
+    _, node_helpers = _get_comfy_modules()
+    errors = []
+    results = []
+    pending = list(names)
+
+    # The first decodable file fixes the batch size when width/height are not given.
+    while pending and not (width and height):
+        name = pending.pop(0)
         try:
-            img = node_helpers.pillow(Image.open, image_path)
+            image, mask, _ = _load_image_tensors(name, os.path.join(base, name), node_helpers)
         except Exception as e:
-            if _is_heic_path(image):
-                raise RuntimeError(
-                    "Failed to open HEIC/HEIF image. Ensure pillow-heif is installed: pip install pillow-heif\n"
-                    f"File: {image}\nError: {e}"
-                )
-            raise RuntimeError(f"Failed to open image: {image}\nError: {e}")
+            errors.append((name, e))
+            continue
+        width = width or image.shape[2]
+        height = height or image.shape[1]
+        results.append(_fit_batch(image, mask, width, height, mode))
 
-        output_images = []
-        output_masks = []
-        w, h = None, None
+    if pending:
+        with ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="heic_batch"
+        ) as executor:
+            for name, result in zip(
+                pending,
+                executor.map(
+                    lambda n: _load_fitted(n, os.path.join(base, n), node_helpers, (width, height), mode),
+                    pending,
+                ),
+            ):
+                if isinstance(result, Exception):
+                    errors.append((name, result))
+                else:
+                    results.append(result)
 
-        excluded_formats = ["MPO"]
+    if not results:
+        return None, None, errors
+    if len(results) == 1:
+        return results[0][0], results[0][1], errors
+    return (
+        torch.cat([r[0] for r in results], dim=0),
+        torch.cat([r[1] for r in results], dim=0),
+        errors,
+    )
 
-        for i in ImageSequence.Iterator(img):
-            i = node_helpers.pillow(ImageOps.exif_transpose, i)
 
-            if i.mode == "I":
-                i = i.point(lambda i: i * (1 / 255))
-            image_rgb = i.convert("RGB")
+def _probe_size(image_path: str) -> tuple[int, int]:
+    """Display size of an image from its header, without decoding pixels."""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
 
-            if len(output_images) == 0:
-                w = image_rgb.size[0]
-                h = image_rgb.size[1]
 
-            if image_rgb.size[0] != w or image_rgb.size[1] != h:
-                continue
+def _resolve_batch_size(base: str, names: list[str], width: int, height: int) -> tuple[int, int]:
+    """Fill in a 0 width/height from the first file whose header can be read."""
+    if width and height:
+        return width, height
+    for name in names:
+        try:
+            w, h = _probe_size(os.path.join(base, name))
+        except Exception:
+            continue
+        return width or w, height or h
+    return width, height
 
-            image_np = np.array(image_rgb).astype(np.float32) / 255.0
-            image_t = torch.from_numpy(image_np)[None,]
 
-            if "A" in i.getbands():
-                mask_np = np.array(i.getchannel("A")).astype(np.float32) / 255.0
-                mask_t = 1.0 - torch.from_numpy(mask_np)
-            elif i.mode == "P" and "transparency" in i.info:
-                mask_np = (
-                    np.array(i.convert("RGBA").getchannel("A")).astype(np.float32) / 255.0
-                )
-                mask_t = 1.0 - torch.from_numpy(mask_np)
-            else:
-                mask_t = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
+def _format_batch_errors(errors) -> str:
+    return "\n".join(f"{name}: {e}" for name, e in errors)
 
-            output_images.append(image_t)
-            output_masks.append(mask_t.unsqueeze(0))
 
-        if not output_images:
-            raise RuntimeError(f"No frames could be decoded from image: {image}")
+class LoadImageBatchHEIC:
+    """Loads every matching image of an input subfolder as one IMAGE/MASK batch."""
 
-        if len(output_images) > 1 and getattr(img, "format", None) not in excluded_formats:
-            output_image = torch.cat(output_images, dim=0)
-            output_mask = torch.cat(output_masks, dim=0)
-        else:
-            output_image = output_images[0]
-            output_mask = output_masks[0]
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "folder": ("STRING", {"default": ""}),
+                "pattern": ("STRING", {"default": "*"}),
+                "width": ("INT", {"default": 0, "min": 0, "max": 16384}),
+                "height": ("INT", {"default": 0, "min": 0, "max": 16384}),
+                "resize_mode": (["pad", "crop", "stretch"],),
+                "workers": ("INT", {"default": min(8, os.cpu_count() or 1), "min": 1, "max": 64}),
+                "on_error": (["skip", "raise"],),
+            },
+        }
 
-        return (output_image, output_mask)
+    CATEGORY = "image"
+
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING")
+    RETURN_NAMES = ("IMAGE", "MASK", "errors")
+    FUNCTION = "load_batch"
+
+    def load_batch(self, folder, pattern, width, height, resize_mode, workers, on_error):
+        _try_register_heif_opener()
+        base = _resolve_input_subfolder(folder)
+        names = _glob_image_files(base, pattern)
+        if not names:
+            raise FileNotFoundError(f"No images match '{pattern}' in input folder '{folder}'")
+
+        image, mask, errors = _load_image_batch(base, names, width, height, resize_mode, workers)
+        if errors and (on_error == "raise" or image is None):
+            raise RuntimeError(
+                f"Failed to load {len(errors)} of {len(names)} images:\n" + _format_batch_errors(errors)
+            )
+        return (image, mask, _format_batch_errors(errors))
 
     @classmethod
-    def IS_CHANGED(cls, image):
-        folder_paths, _ = _get_comfy_modules()
-        image_path = folder_paths.get_annotated_filepath(image)
+    def IS_CHANGED(cls, folder, pattern, **kwargs):
+        base = _resolve_input_subfolder(folder)
         m = hashlib.sha256()
-        with open(image_path, "rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                m.update(chunk)
+        for name in _glob_image_files(base, pattern):
+            m.update(name.encode("utf-8"))
+            m.update(_file_fingerprint(os.path.join(base, name)).encode("utf-8"))
         return m.digest().hex()
 
     @classmethod
-    def VALIDATE_INPUTS(cls, image):
-        folder_paths, _ = _get_comfy_modules()
-        if not folder_paths.exists_annotated_filepath(image):
-            return "Invalid image file: {}".format(image)
+    def VALIDATE_INPUTS(cls, folder, pattern, **kwargs):
+        try:
+            base = _resolve_input_subfolder(folder)
+            _check_glob_pattern(pattern)
+        except Exception as e:
+            return str(e)
+        if not os.path.isdir(base):
+            return "Invalid input folder: {}".format(folder)
         return True
 
 
+class LoadImageBatchChunkHEIC(LoadImageBatchHEIC):
+    """Loads one fixed-size chunk of a folder, for folders too large to load at once.
+
+    Iterate ``chunk_index`` from 0 to ``chunk_count - 1`` (e.g. with a queue or loop node)
+    to process the folder incrementally. Every chunk uses the same frame size.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        inputs = super().INPUT_TYPES()
+        inputs["required"]["chunk_size"] = ("INT", {"default": 16, "min": 1, "max": 4096})
+        inputs["required"]["chunk_index"] = ("INT", {"default": 0, "min": 0, "max": 0xFFFFFFFF})
+        return inputs
+
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING", "INT", "INT")
+    RETURN_NAMES = ("IMAGE", "MASK", "errors", "chunk_count", "file_count")
+    FUNCTION = "load_chunk"
+
+    def load_chunk(self, folder, pattern, width, height, resize_mode, workers, on_error, chunk_size, chunk_index):
+        _try_register_heif_opener()
+        base = _resolve_input_subfolder(folder)
+        names = _glob_image_files(base, pattern)
+        if not names:
+            raise FileNotFoundError(f"No images match '{pattern}' in input folder '{folder}'")
+
+        chunk_count = (len(names) + chunk_size - 1) // chunk_size
+        if chunk_index >= chunk_count:
+            raise ValueError(f"chunk_index {chunk_index} is out of range (0..{chunk_count - 1})")
+
+        # Size comes from the whole folder, not the chunk, so all chunks match.
+        width, height = _resolve_batch_size(base, names, width, height)
+        start = chunk_index * chunk_size
+        image, mask, errors = _load_image_batch(
+            base, names[start : start + chunk_size], width, height, resize_mode, workers
+        )
+        if errors and (on_error == "raise" or image is None):
+            raise RuntimeError(
+                f"Failed to load {len(errors)} images of chunk {chunk_index}:\n" + _format_batch_errors(errors)
+            )
+        return (image, mask, _format_batch_errors(errors), chunk_count, len(names))
+
+
 NODE_CLASS_MAPPINGS = {
     "LoadImagePlusHEIC": LoadImagePlusHEIC,
+    "LoadImageBatchHEIC": LoadImageBatchHEIC,
+    "LoadImageBatchChunkHEIC": LoadImageBatchChunkHEIC,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "LoadImagePlusHEIC": "Load Image (HEIC)",
+    "LoadImageBatchHEIC": "Load Image Batch (HEIC)",
+    "LoadImageBatchChunkHEIC": "Load Image Batch Chunk (HEIC)",
 }
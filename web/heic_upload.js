@@ -1,6 +1,78 @@
 (function () {
   const EXT_NAME = "ComfyUI_LoadHEICImage.heic_upload";
   const HEIC_EXTS = [".heic", ".heif"];
+  // Node thumbnails never need the full 12+ MP image; the server downscales during decode.
+  const PREVIEW_MAX_SIDE = 1024;
+
+  function heicPreviewUrl(filename, maxSide, format, thumbnail) {
+    let url = `/heic_preview?filename=${encodeURIComponent(filename)}`;
+    if (maxSide) url += `&max_side=${maxSide}`;
+    // Without a format the server negotiates one (JPEG for opaque photos).
+    if (format) url += `&format=${format}`;
+    // "only" returns the embedded HEIF thumbnail (404 if there is none), never a full decode.
+    if (thumbnail) url += `&thumbnail=${thumbnail}`;
+    // No cache-busting: the server sends ETag/Last-Modified and answers 304 when unchanged.
+    return url;
+  }
+
+  // /heic_preview answers 503 once its worker queue is full, which a workflow with dozens
+  // of HEIC nodes reaches on load. Node previews therefore go through a small client-side
+  // queue: a few requests at a time, thumbnails first, and failed full previews are retried
+  // with a capped backoff (an <img> cannot read the status or Retry-After). Each failure
+  // also lowers the number of parallel requests, so a smaller server pool is not flooded.
+  const PREVIEW_CONCURRENCY = 4;
+  const PREVIEW_RETRIES = 4;
+  const previewQueues = { thumbnail: [], full: [] };
+  let previewActive = 0;
+  let previewLimit = PREVIEW_CONCURRENCY;
+  // Files whose thumbnail=only request failed (most have no embedded thumbnail), and full
+  // previews already loaded once (the browser revalidates those with a cheap 304).
+  const filesWithoutThumbnail = new Set();
+  const loadedPreviews = new Set();
+
+  function pumpPreviewQueue() {
+    while (previewActive < previewLimit) {
+      const job = previewQueues.thumbnail.shift() ?? previewQueues.full.shift();
+      if (!job) return;
+      if (!job.isCurrent()) {
+        job.done(null);
+        continue;
+      }
+      previewActive++;
+      const img = new Image();
+      img.onload = () => {
+        previewActive--;
+        previewLimit = Math.min(PREVIEW_CONCURRENCY, previewLimit + 1);
+        job.done(img);
+        pumpPreviewQueue();
+      };
+      img.onerror = () => {
+        previewActive--;
+        previewLimit = Math.max(1, previewLimit - 1);
+        if (job.attempt < job.retries) {
+          const delay = Math.min(1000 * 2 ** job.attempt, 8000);
+          job.attempt++;
+          setTimeout(() => {
+            previewQueues[job.kind].push(job);
+            pumpPreviewQueue();
+          }, delay);
+        } else {
+          job.done(null);
+        }
+        pumpPreviewQueue();
+      };
+      img.src = job.url;
+    }
+  }
+
+  // Resolves to the loaded Image, or null if it failed or went stale before it started.
+  function queuePreview(url, kind, isCurrent) {
+    return new Promise((resolve) => {
+      const retries = kind === "full" ? PREVIEW_RETRIES : 0;
+      previewQueues[kind].push({ url, kind, isCurrent, retries, attempt: 0, done: resolve });
+      pumpPreviewQueue();
+    });
+  }
 
   function isHeicFile(file) {
     const name = (file && file.name ? file.name : "").toLowerCase();
@@ -93,13 +165,11 @@
       return;
     }
 
-    const url = `/heic_preview?filename=${encodeURIComponent(value)}&t=${Date.now()}`;
+    const url = heicPreviewUrl(value, PREVIEW_MAX_SIDE);
+    const thumbUrl = heicPreviewUrl(value, PREVIEW_MAX_SIDE, undefined, "only");
     console.log("[HEIC] Loading preview from:", url);
 
-    // Create new image object
-    const imgObj = new Image();
-    imgObj.onload = () => {
-      console.log("[HEIC] Image loaded successfully, updating node");
+    const showImage = (imgObj) => {
       // After image loads, force canvas redraw
       if (node) {
         node.img = imgObj;
@@ -112,10 +182,34 @@
         markDirty(window.app);
       }
     };
-    imgObj.onerror = (err) => {
-      console.error("[HEIC] Failed to load HEIC preview:", url, err);
-    };
-    imgObj.src = url;
+    // The user may pick another file before these loads finish; drop stale results.
+    const isCurrent = () => !widget || widget.value === value;
+
+    // Queue the embedded thumbnail and the full preview together: the thumbnail shows
+    // within milliseconds and is ignored if the full preview arrives first. It is skipped
+    // for files known to have none and for previews that were already loaded once.
+    let fullShown = false;
+    if (!filesWithoutThumbnail.has(value) && !loadedPreviews.has(url)) {
+      queuePreview(thumbUrl, "thumbnail", isCurrent).then((thumbObj) => {
+        if (!isCurrent()) return;
+        if (!thumbObj) {
+          filesWithoutThumbnail.add(value);
+        } else if (!fullShown) {
+          showImage(thumbObj);
+        }
+      });
+    }
+    queuePreview(url, "full", isCurrent).then((fullObj) => {
+      if (fullObj) loadedPreviews.add(url);
+      if (!isCurrent()) return;
+      if (!fullObj) {
+        console.error("[HEIC] Failed to load HEIC preview:", url);
+        return;
+      }
+      console.log("[HEIC] Image loaded successfully, updating node");
+      fullShown = true;
+      showImage(fullObj);
+    });
 
     // Also update widget candidates immediately
     const candidates = [widget?.img, widget?.image, widget?._img, widget?._image, widget?.el, node?.img, node?._img];
@@ -142,7 +236,8 @@
           const u = new URL(url, window.location.origin);
           const filename = u.searchParams.get("filename");
           if (filename) {
-            const newUrl = `/heic_preview?filename=${encodeURIComponent(filename)}&t=${Date.now()}`;
+            // Full resolution, lossless: fetched images feed editors (e.g. the mask editor).
+            const newUrl = heicPreviewUrl(filename, 0, "png");
             return origFetch(newUrl, init);
           }
         }
@@ -176,7 +271,9 @@
             const url = new URL(value, window.location.origin);
             const filename = url.searchParams.get('filename');
             if (filename && (filename.toLowerCase().endsWith('.heic') || filename.toLowerCase().endsWith('.heif'))) {
-              const newUrl = `/heic_preview?filename=${encodeURIComponent(filename)}&t=${Date.now()}`;
+              // Full resolution, lossless: this hook sees every <img> (lightbox, queue,
+              // mask editor), not just node previews, which size themselves.
+              const newUrl = heicPreviewUrl(filename, 0, "png");
               console.log("[HEIC] Redirecting Image.src from", value, "to", newUrl);
               originalSrcSetter.call(this, newUrl);
               return;